@@ -4,6 +4,9 @@ import time
 import logging
 import os
 import re
+import csv
+import unicodedata
+from collections import Counter
 import requests
 import pandas as pd
 from bs4 import BeautifulSoup
@@ -12,6 +15,7 @@ from urllib.parse import urljoin
 from google.cloud import storage
 from datetime import datetime, timezone
 from ..load.validate_and_load_gcs import run_validation_and_load
+from ..load.listings_schema import read_listings_csv
 
 # Configura el logger para que la salida se parezca a los registros del usuario.
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,6 +23,13 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Usa os.environ.get para manejar el caso en que la variable no exista.
 GOOGLE_BUCKET_NAME = os.environ.get("GOOGLE_BUCKET_NAME")
 
+# Gazetteer local de puntos de interés de NYC (CSV con columnas nombre, latitude, longitude y aliases opcionales).
+GAZETTEER_PATH = os.environ.get("GAZETTEER_PATH", "./data/nyc_poi_gazetteer.csv")
+# Confianza mínima para aceptar una coincidencia local sin consultar la API remota.
+GAZETTEER_MIN_CONFIDENCE = float(os.environ.get("GAZETTEER_MIN_CONFIDENCE", "0.6"))
+# Si es 'false', los nombres con baja confianza no se envían a Nominatim (modo totalmente offline).
+GEOCODER_REMOTE_FALLBACK = os.environ.get("GEOCODER_REMOTE_FALLBACK", "true").lower() == "true"
+
 # --- Clases para el patrón Factory Method ---
 
 class BaseExtractor(ABC):
@@ -52,12 +63,16 @@ class CsvFileExtractor(BaseExtractor):
     def extract_data(self):
         try:
             logging.info(f"Iniciando lectura de datos del archivo CSV: {self.file_path}")
-            df = pd.read_csv(self.file_path)
+            df = read_listings_csv(self.file_path)
             logging.info("Datos del CSV leídos correctamente.")
-            return {"source": "csv_file", "data": df.to_dict('records')}
+            # Se entrega el DataFrame tipado para conservar el ahorro de memoria del esquema
+            return {"source": "csv_file", "data": df}
         except FileNotFoundError:
             logging.error(f"Error: El archivo {self.file_path} no se encontró.")
             return None
+        except ValueError as e:
+            logging.error(f"Error en los tipos del archivo CSV {self.file_path}: {e}")
+            return None
 
 class WebScrapingExtractor(BaseExtractor):
     """
@@ -155,18 +170,142 @@ class WebScrapingExtractor(BaseExtractor):
             logging.error(f"Error al procesar la respuesta HTML: {e}")
             return None
         
-# --- Nueva clase para geocodificación ---
+# --- Clases para geocodificación local (gazetteer) ---
+
+def normalize_place_name(name: str) -> str:
+    """
+    Normaliza un nombre de lugar para comparar: minúsculas, sin acentos ni
+    signos de puntuación y con los espacios colapsados.
+    """
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return " ".join(text.split())
+
+def _trigrams(normalized: str) -> set:
+    """Trigramas de caracteres de un nombre normalizado, con relleno en los extremos."""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class GazetteerGeocoder:
+    """
+    Geocodificador offline sobre un gazetteer local de puntos de interés.
+
+    Al cargarse construye tres índices en memoria: nombre normalizado exacto,
+    token -> entradas y trigrama -> entradas. Los índices de tokens y trigramas
+    cuentan cuántos elementos comparte cada entrada con la consulta, de modo que
+    solo se comparan las entradas que tienen algo en común y resolver unos
+    cientos de nombres toma milisegundos.
+    """
+    def __init__(self, entries):
+        # entries: lista de (nombre, latitud, longitud); los alias son entradas adicionales.
+        self.entries = []
+        self.exact_index = {}
+        self.token_index = {}
+        self.trigram_index = {}
+
+        for name, latitude, longitude in entries:
+            normalized = normalize_place_name(name)
+            if not normalized:
+                continue
+            entry_id = len(self.entries)
+            tokens = set(normalized.split())
+            trigrams = _trigrams(normalized)
+            self.entries.append((normalized, len(tokens), len(trigrams), (latitude, longitude)))
+            self.exact_index.setdefault(normalized, entry_id)
+            for token in tokens:
+                self.token_index.setdefault(token, set()).add(entry_id)
+            for trigram in trigrams:
+                self.trigram_index.setdefault(trigram, set()).add(entry_id)
+
+    @classmethod
+    def from_csv(cls, file_path: str):
+        """
+        Carga el gazetteer desde un CSV con columnas 'nombre', 'latitude',
+        'longitude' y, opcionalmente, 'aliases' separados por '|'.
+
+        Retorna la instancia o 'None' si el archivo no existe o no es válido.
+        """
+        if not file_path or not os.path.exists(file_path):
+            logging.warning(f"No se encontró el gazetteer local en {file_path}. Se usará solo la API remota.")
+            return None
+        try:
+            entries = []
+            with open(file_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    coords = (float(row["latitude"]), float(row["longitude"]))
+                    names = [row["nombre"]] + [a for a in (row.get("aliases") or "").split("|") if a.strip()]
+                    entries.extend((name, *coords) for name in names)
+            gazetteer = cls(entries)
+            logging.info(f"Gazetteer local cargado: {len(gazetteer.entries)} nombres desde {file_path}.")
+            return gazetteer
+        except (KeyError, ValueError) as e:
+            logging.error(f"Error al leer el gazetteer local {file_path}: {e}")
+            return None
+
+    def geocode(self, name: str):
+        """
+        Busca el nombre en el gazetteer.
+
+        Retorna (latitud, longitud, confianza) con confianza entre 0 y 1, que
+        promedia la similitud de trigramas y la de tokens (Jaccard). Si no hay
+        candidatos retorna (None, None, 0.0).
+        """
+        normalized = normalize_place_name(name)
+        if not normalized:
+            return None, None, 0.0
+
+        entry_id = self.exact_index.get(normalized)
+        if entry_id is not None:
+            latitude, longitude = self.entries[entry_id][3]
+            return latitude, longitude, 1.0
+
+        query_trigrams = _trigrams(normalized)
+        query_tokens = set(normalized.split())
+
+        # Cuenta cuántos trigramas y cuántos tokens comparte cada candidato con la consulta.
+        shared_trigrams = Counter()
+        for trigram in query_trigrams:
+            shared_trigrams.update(self.trigram_index.get(trigram, ()))
+        shared_tokens = Counter()
+        for token in query_tokens:
+            shared_tokens.update(self.token_index.get(token, ()))
+
+        best_id, best_score = None, 0.0
+        for entry_id in shared_trigrams.keys() | shared_tokens.keys():
+            _, n_tokens, n_trigrams, _ = self.entries[entry_id]
+            common_trigrams = shared_trigrams[entry_id]
+            common_tokens = shared_tokens[entry_id]
+            trigram_score = common_trigrams / (len(query_trigrams) + n_trigrams - common_trigrams)
+            token_score = common_tokens / (len(query_tokens) + n_tokens - common_tokens)
+            score = (trigram_score + token_score) / 2
+            if score > best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None:
+            return None, None, 0.0
+        latitude, longitude = self.entries[best_id][3]
+        return latitude, longitude, best_score
+
 # --- Clase para geocodificación dinámica ---
 
 class GeocodingTransformer:
-    def __init__(self):
+    def __init__(self, gazetteer: GazetteerGeocoder = None, min_confidence: float = GAZETTEER_MIN_CONFIDENCE,
+                 remote_fallback: bool = GEOCODER_REMOTE_FALLBACK):
         self.geolocator = Nominatim(user_agent="my-data-pipeline-app")
+        # Backend local opcional; se consulta antes que la API remota.
+        self.gazetteer = gazetteer
+        self.min_confidence = min_confidence
+        self.remote_fallback = remote_fallback
         # El diccionario se construirá dinámicamente
         self.known_locations = {}
 
     def geocode_by_name(self, name: str):
         """
         Geocodifica un lugar por su nombre y almacena el resultado en el diccionario.
+
+        Primero se busca en el gazetteer local; solo si la coincidencia tiene
+        confianza menor a 'min_confidence' se consulta Nominatim.
         """
         normalized_name = name.lower().strip()
         
@@ -174,8 +313,22 @@ class GeocodingTransformer:
         if normalized_name in self.known_locations:
             logging.info(f"   Coordenadas encontradas en caché para: {name}")
             return self.known_locations[normalized_name]
-            
-        # 2. Si no están en el caché, las busca a través de la API
+
+        # 2. Busca en el gazetteer local
+        if self.gazetteer is not None:
+            latitude, longitude, confidence = self.gazetteer.geocode(name)
+            if confidence >= self.min_confidence:
+                logging.info(f"   Coordenadas locales para {name}: {latitude}, {longitude} (confianza {confidence:.2f})")
+                self.known_locations[normalized_name] = (latitude, longitude)
+                return latitude, longitude
+            logging.info(f"   Baja confianza local para {name} ({confidence:.2f}).")
+
+        if not self.remote_fallback:
+            logging.warning(f"   No se encontraron coordenadas locales para: {name}")
+            self.known_locations[normalized_name] = (None, None)
+            return None, None
+
+        # 3. Si no están en el caché ni en el gazetteer, las busca a través de la API
         try:
             logging.info(f"   Buscando coordenadas para: {name}")
             # Añade "New York, USA" para mejorar la precisión
@@ -234,8 +387,13 @@ def check_if_file_exists_in_gcs(bucket_name: str, file_name: str) -> bool:
     
     return len(list(blobs)) > 0
 
-def run_extraction_pipeline():
-    """Ejecuta el pipeline de extracción de datos de múltiples fuentes."""
+def run_extraction_pipeline(upload: bool = True):
+    """
+    Ejecuta el pipeline de extracción de datos de múltiples fuentes.
+
+    Con upload=False no se valida ni se sube nada a GCS: se devuelven los datos
+    completos por fuente para que el llamador los entregue directamente a la carga.
+    """
     fecha_hoy = datetime.today().strftime('%Y-%m-%d')
     url_bcra = f"https://api.bcra.gob.ar/estadisticascambiarias/v1.0/Cotizaciones"
     
@@ -246,8 +404,8 @@ def run_extraction_pipeline():
         {"type": "web_scraping", "args": ["https://www.nuevayork.net/monumentos-atracciones", "web_scraping_atracciones"]}
     ]
     
-    # Crea una única instancia del transformador de geocodificación
-    geocoder = GeocodingTransformer()
+    # Crea una única instancia del transformador de geocodificación, con el gazetteer local si existe
+    geocoder = GeocodingTransformer(gazetteer=GazetteerGeocoder.from_csv(GAZETTEER_PATH))
 
     uploaded_sources = {}  # <-- aquí guardaremos un resumen
 
@@ -276,7 +434,10 @@ def run_extraction_pipeline():
                 data["data"] = geocoded_data
                 logging.info("Geocodificación por nombre completada.")
 
-            if data:
+            if data and not upload:
+                # Modo entrega directa: se devuelven los datos completos
+                uploaded_sources[data["source"]] = data["data"]
+            elif data:
                 # Validación y subida a GCS directamente aquí
                 run_validation_and_load({data["source"]: data["data"]})
 
@@ -0,0 +1,92 @@
+# Módulo con el esquema de tipos de los listados de Airbnb NYC (AB_NYC.csv)
+import argparse
+import logging
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Tipos de pandas para cada columna de AB_NYC, alineados con la tabla 'nyc_raw'
+# de create_all_tables(). Los textos de baja cardinalidad son categóricos y los
+# enteros son nullable por si faltan valores: 'id' y 'host_id' son BigInteger en
+# la tabla (los ids actuales de Inside Airbnb tienen 17-18 dígitos), así que se
+# leen como Int64. Los flotantes se mantienen en float64: float32 agrega ruido a
+# los decimales (0.21 -> 0.20999999344348907) y no respeta Numeric(10, 8) ni Numeric(10, 2).
+LISTINGS_DTYPES = {
+    'id': 'Int64',
+    'name': 'object',
+    'host_id': 'Int64',
+    'host_name': 'category',
+    'neighbourhood_group': 'category',
+    'neighbourhood': 'category',
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'room_type': 'category',
+    'price': 'float64',
+    'minimum_nights': 'Int64',
+    'number_of_reviews': 'Int64',
+    'reviews_per_month': 'float64',
+    'calculated_host_listings_count': 'Int64',
+    'availability_365': 'Int64',
+}
+
+# Columnas Integer de 'nyc_raw'. read_csv() no avisa si un valor no entra en el
+# tipo pedido (lo trunca en silencio), así que se leen como Int64 y se reducen
+# a Int32 después de comprobar el rango.
+LISTINGS_INT32_COLUMNS = ['minimum_nights', 'number_of_reviews', 'calculated_host_listings_count', 'availability_365']
+INT32_MIN, INT32_MAX = -2**31, 2**31 - 1
+
+# Columnas de fecha, que se parsean una sola vez al leer.
+LISTINGS_DATE_COLUMNS = ['last_review']
+
+
+def read_listings_csv(file_path_or_buffer) -> pd.DataFrame:
+    """
+    Lee el CSV de listados aplicando el esquema de tipos declarado.
+
+    Lanza ValueError si alguna columna Integer tiene valores fuera del rango de Int32.
+    """
+    df = pd.read_csv(file_path_or_buffer, dtype=LISTINGS_DTYPES, parse_dates=LISTINGS_DATE_COLUMNS)
+    for col in LISTINGS_INT32_COLUMNS:
+        if col not in df.columns:
+            continue
+        out_of_range = df[col].notna() & ((df[col] < INT32_MIN) | (df[col] > INT32_MAX))
+        if out_of_range.any():
+            raise ValueError(
+                f"La columna '{col}' tiene {int(out_of_range.sum())} valores fuera del rango de Int32 "
+                f"(por ejemplo {df.loc[out_of_range, col].iloc[0]})."
+            )
+        df[col] = df[col].astype('Int32')
+    return df
+
+
+def memory_footprint_report(file_path: str) -> pd.DataFrame:
+    """
+    Compara la memoria (deep) de cada columna leyendo el CSV con la inferencia
+    por defecto de pandas y con el esquema declarado.
+    """
+    default_df = pd.read_csv(file_path)
+    typed_df = read_listings_csv(file_path)
+
+    report = pd.DataFrame({
+        'default_dtype': default_df.dtypes.astype(str),
+        'default_bytes': default_df.memory_usage(deep=True, index=False),
+        'typed_dtype': typed_df.dtypes.astype(str),
+        'typed_bytes': typed_df.memory_usage(deep=True, index=False),
+    })
+    report.loc['TOTAL', ['default_bytes', 'typed_bytes']] = report[['default_bytes', 'typed_bytes']].sum()
+    report['ratio'] = report['default_bytes'] / report['typed_bytes']
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reporte de memoria de los listados con y sin esquema de tipos.")
+    parser.add_argument("file_path", nargs="?", default="./data/AB_NYC.csv", help="Ruta del CSV de listados.")
+    args = parser.parse_args()
+
+    result = memory_footprint_report(args.file_path)
+    print(result.to_string())
+    total = result.loc['TOTAL']
+    logging.info(
+        f"Memoria total: {total['default_bytes'] / 1e6:.1f} MB por defecto frente a "
+        f"{total['typed_bytes'] / 1e6:.1f} MB con esquema ({total['ratio']:.1f}x)."
+    )
@@ -1,16 +1,52 @@
 import os
 import io
+import re
 import json
+import hashlib
 import logging
 import pandas as pd
 from google.cloud import storage
 from datetime import datetime, timezone
-from sqlalchemy import create_engine, MetaData, Table, Column, String, Integer, BigInteger, Numeric, Date, Text
+from sqlalchemy import create_engine, text, MetaData, Table, Column, String, Integer, BigInteger, Numeric, Date, DateTime, Text
 from sqlalchemy.exc import OperationalError
 import pymysql
+from .listings_schema import read_listings_csv
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Número de filas que se confirman por transacción durante la carga.
+CHUNK_SIZE = int(os.getenv("LOAD_CHUNK_SIZE", "5000"))
+
+# Modo de carga: 'direct' escribe en las tablas vivas; 'swap' carga en tablas
+# sombra ('<tabla>__next') y las publica con un RENAME TABLE atómico.
+LOAD_MODE = os.getenv("LOAD_MODE", "direct").lower()
+SHADOW_SUFFIX = "__next"
+PREVIOUS_SUFFIX = "__prev"
+
+# Claves naturales de las tablas de referencia. Estas tablas se cargan con
+# upsert en lugar de acumular una copia de cada fila por ejecución.
+NATURAL_KEYS = {
+    "bcra_raw": ["fecha", "codigoMoneda"],
+    "atracciones_raw": ["nombre_normalizado"],
+    "museos_raw": ["nombre_normalizado"],
+}
+
+# Tipos MySQL de las columnas clave (necesarios para declararlas NOT NULL al compactar).
+KEY_COLUMN_TYPES = {
+    "fecha": "DATE",
+    "codigoMoneda": "VARCHAR(255)",
+    "nombre_normalizado": "VARCHAR(255)",
+}
+
+# Equivalente SQL de normalize_name(), usado para rellenar tablas existentes.
+NORMALIZED_NAME_SQL = "LOWER(TRIM(REGEXP_REPLACE(nombre, '[[:space:]]+', ' ')))"
+
+def normalize_name(name) -> str:
+    """Normaliza un nombre de lugar: minúsculas, sin espacios repetidos ni en los extremos."""
+    if name is None:
+        return None
+    return re.sub(r"\s+", " ", str(name)).strip().lower()
+
 def get_db_connection():
     """
     Genera y devuelve un objeto Engine de SQLAlchemy para la conexión a Cloud SQL.
@@ -68,10 +104,10 @@ def create_all_tables(engine):
     )
 
     bcra_raw = Table('bcra_raw', metadata,
-        Column('fecha', Date),
+        Column('fecha', Date, primary_key=True),
         Column('tipoMoneda', String(255)),
         Column('descripcion', Text),
-        Column('codigoMoneda', String(255)),
+        Column('codigoMoneda', String(255), primary_key=True),
         Column('tipoPase', Numeric(precision=18, scale=8)),
         Column('tipoCotizacion', Numeric(precision=18, scale=8)),
         Column('compra', Numeric(precision=18, scale=8)),
@@ -84,6 +120,7 @@ def create_all_tables(engine):
         Column('direccion', Text),
         Column('latitude', Numeric(precision=10, scale=8)),
         Column('longitude', Numeric(precision=11, scale=8)),
+        Column('nombre_normalizado', String(255), primary_key=True),
     )
 
     museos_raw = Table('museos_raw', metadata,
@@ -92,6 +129,18 @@ def create_all_tables(engine):
         Column('direccion', Text),
         Column('latitude', Numeric(precision=10, scale=8)),
         Column('longitude', Numeric(precision=11, scale=8)),
+        Column('nombre_normalizado', String(255), primary_key=True),
+    )
+
+    # Progreso de cada carga: filas confirmadas y hash del último chunk,
+    # para poder reanudar una carga interrumpida.
+    load_state = Table('load_state', metadata,
+        Column('source_object', String(255), primary_key=True),
+        Column('table_name', String(64), primary_key=True),
+        Column('chunk_offset', BigInteger, nullable=False),
+        Column('row_hash', String(64)),
+        Column('status', String(16), nullable=False),
+        Column('updated_at', DateTime),
     )
 
     try:
@@ -102,6 +151,258 @@ def create_all_tables(engine):
         logging.error(f"Error al crear las tablas: {e}")
         return False
 
+def _has_primary_key(conn, table_name: str) -> bool:
+    """Indica si la tabla ya tiene clave primaria en la base actual."""
+    result = conn.execute(text(
+        "SELECT COUNT(*) FROM information_schema.table_constraints "
+        "WHERE table_schema = DATABASE() AND table_name = :table_name AND constraint_type = 'PRIMARY KEY'"
+    ), {"table_name": table_name})
+    return result.scalar() > 0
+
+def _table_columns(conn, table_name: str) -> list:
+    """Devuelve las columnas de la tabla en su orden de definición."""
+    result = conn.execute(text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = :table_name ORDER BY ordinal_position"
+    ), {"table_name": table_name})
+    return [row[0] for row in result]
+
+def _has_column(conn, table_name: str, column_name: str) -> bool:
+    """Indica si la tabla tiene la columna indicada."""
+    result = conn.execute(text(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = :table_name AND column_name = :column_name"
+    ), {"table_name": table_name, "column_name": column_name})
+    return result.scalar() > 0
+
+def compact_reference_tables(engine) -> bool:
+    """
+    Elimina los duplicados históricos de las tablas de referencia creadas antes
+    de tener clave natural y les agrega la clave primaria.
+
+    Para cada tabla sin clave primaria se construye una copia compactada
+    ('<tabla>__compact') con la clave ya declarada, se llena con el mismo upsert
+    de la carga diaria (INSERT ... ON DUPLICATE KEY UPDATE) y se publica con un
+    RENAME TABLE atómico. Las tablas que ya tienen clave se omiten, así que la
+    función se puede ejecutar en cada corrida.
+
+    Por cada clave queda la última fila que devuelve el SELECT. Estas tablas no
+    tienen columna de fecha de carga y MySQL no garantiza el orden de un SELECT
+    sin ORDER BY, así que entre duplicados no se asegura conservar el último
+    cargado (en InnoDB suele coincidir con el orden de inserción).
+
+    Si la copia compactada tiene menos filas que claves distintas en la tabla
+    original, no se publica y la tabla original queda intacta.
+    """
+    try:
+        for table_name, keys in NATURAL_KEYS.items():
+            with engine.begin() as conn:
+                if _has_primary_key(conn, table_name):
+                    continue
+
+                logging.info(f"Compactando la tabla '{table_name}' por clave natural {keys}...")
+                if "nombre_normalizado" in keys:
+                    if not _has_column(conn, table_name, "nombre_normalizado"):
+                        conn.execute(text(f"ALTER TABLE `{table_name}` ADD COLUMN `nombre_normalizado` VARCHAR(255) NULL"))
+                    # El ALTER TABLE confirma la transacción, así que si el backfill falló en una
+                    # corrida anterior la columna ya existe vacía: se completa siempre lo que falte.
+                    conn.execute(text(
+                        f"UPDATE `{table_name}` SET `nombre_normalizado` = {NORMALIZED_NAME_SQL} "
+                        f"WHERE `nombre_normalizado` IS NULL AND `nombre` IS NOT NULL"
+                    ))
+
+                compact_name = f"{table_name}__compact"
+                modify_keys = ", ".join(f"MODIFY `{k}` {KEY_COLUMN_TYPES[k]} NOT NULL" for k in keys)
+                key_cols = ", ".join(f"`{k}`" for k in keys)
+                not_null = " AND ".join(f"`{k}` IS NOT NULL" for k in keys)
+
+                conn.execute(text(f"DROP TABLE IF EXISTS `{compact_name}`"))
+                conn.execute(text(f"CREATE TABLE `{compact_name}` LIKE `{table_name}`"))
+                conn.execute(text(f"ALTER TABLE `{compact_name}` {modify_keys}, ADD PRIMARY KEY ({key_cols})"))
+                columns = _table_columns(conn, table_name)
+                cols = ", ".join(f"`{col}`" for col in columns)
+                updates = ", ".join(f"`{col}` = VALUES(`{col}`)" for col in columns if col not in keys)
+                conn.execute(text(
+                    f"INSERT INTO `{compact_name}` ({cols}) SELECT {cols} FROM `{table_name}` WHERE {not_null} "
+                    f"ON DUPLICATE KEY UPDATE {updates}"
+                ))
+
+                before = conn.execute(text(f"SELECT COUNT(*) FROM `{table_name}`")).scalar()
+                after = conn.execute(text(f"SELECT COUNT(*) FROM `{compact_name}`")).scalar()
+                distinct_keys = conn.execute(text(
+                    f"SELECT COUNT(*) FROM (SELECT DISTINCT {key_cols} FROM `{table_name}` WHERE {not_null}) AS k"
+                )).scalar()
+                if (after == 0 and before > 0) or after < distinct_keys:
+                    conn.execute(text(f"DROP TABLE `{compact_name}`"))
+                    logging.error(
+                        f"Compactación de '{table_name}' descartada: {after} filas compactadas para "
+                        f"{distinct_keys} claves distintas ({before} filas originales). La tabla no se modificó."
+                    )
+                    return False
+
+                conn.execute(text(f"RENAME TABLE `{table_name}` TO `{table_name}__old`, `{compact_name}` TO `{table_name}`"))
+                conn.execute(text(f"DROP TABLE `{table_name}__old`"))
+                logging.info(f"Tabla '{table_name}' compactada: {before} -> {after} filas. 🧹")
+        return True
+    except Exception as e:
+        logging.error(f"Error al compactar las tablas de referencia: {e}")
+        return False
+
+def _secondary_indexes(conn, table_name: str) -> dict:
+    """
+    Devuelve los índices secundarios de una tabla como
+    {nombre: (es_unico, [columnas en orden])}.
+    """
+    result = conn.execute(text(
+        "SELECT index_name, non_unique, column_name FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = :table_name AND index_name <> 'PRIMARY' "
+        "ORDER BY index_name, seq_in_index"
+    ), {"table_name": table_name})
+    indexes = {}
+    for index_name, non_unique, column_name in result:
+        indexes.setdefault(index_name, (not non_unique, []))[1].append(column_name)
+    return indexes
+
+def prepare_shadow_table(engine, table_name: str, source_object: str) -> dict:
+    """
+    Prepara la tabla sombra '<tabla>__next' para una carga en modo swap.
+
+    La sombra se crea con la misma estructura que la tabla viva, se siembra con
+    su contenido actual (la carga diaria es acumulativa) y se le quitan los
+    índices secundarios para que la carga masiva no tenga que mantenerlos.
+    Si ya existe una sombra con una carga a medias del mismo objeto, se
+    reutiliza para poder reanudarla.
+
+    Retorna una tupla (índices secundarios a reconstruir, filas sembradas), o
+    (None, None) si falla.
+    """
+    shadow = f"{table_name}{SHADOW_SUFFIX}"
+    try:
+        with engine.begin() as conn:
+            indexes = _secondary_indexes(conn, table_name)
+            pending = conn.execute(text(
+                "SELECT COUNT(*) FROM load_state WHERE source_object = :source_object "
+                "AND table_name = :shadow AND status = 'in_progress'"
+            ), {"source_object": source_object, "shadow": shadow}).scalar()
+            shadow_exists = conn.execute(text(
+                "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = :shadow"
+            ), {"shadow": shadow}).scalar()
+
+            if pending and shadow_exists:
+                # En modo swap la tabla viva no se modifica, así que sigue teniendo
+                # las mismas filas con las que se sembró la sombra.
+                seeded_count = conn.execute(text(f"SELECT COUNT(*) FROM `{table_name}`")).scalar()
+                logging.info(f"Reutilizando la tabla sombra '{shadow}' para reanudar la carga.")
+                return indexes, seeded_count
+
+            conn.execute(text("DELETE FROM load_state WHERE table_name = :shadow"), {"shadow": shadow})
+            conn.execute(text(f"DROP TABLE IF EXISTS `{shadow}`"))
+            conn.execute(text(f"CREATE TABLE `{shadow}` LIKE `{table_name}`"))
+            for index_name in indexes:
+                conn.execute(text(f"ALTER TABLE `{shadow}` DROP INDEX `{index_name}`"))
+            seeded_count = conn.execute(text(f"INSERT INTO `{shadow}` SELECT * FROM `{table_name}`")).rowcount
+        logging.info(f"Tabla sombra '{shadow}' preparada con {seeded_count} filas.")
+        return indexes, seeded_count
+    except Exception as e:
+        logging.error(f"Error al preparar la tabla sombra '{shadow}': {e}")
+        return None, None
+
+def finalize_shadow_table(engine, table_name: str, indexes: dict, seeded_count: int,
+                          df: pd.DataFrame, source_object: str) -> bool:
+    """
+    Reconstruye los índices secundarios en la tabla sombra y valida la carga:
+    'load_state' de la sombra debe estar en 'done' con todas las filas del
+    DataFrame, y la sombra debe tener al menos las filas sembradas más las
+    claves nuevas que trae el DataFrame.
+    """
+    shadow = f"{table_name}{SHADOW_SUFFIX}"
+    df = _prepare_load_frame(df, table_name)
+    keys = NATURAL_KEYS.get(table_name, ["id"])
+    key_cols = ", ".join(f"`{k}`" for k in keys)
+    try:
+        with engine.begin() as conn:
+            existing = _secondary_indexes(conn, shadow)
+            for index_name, (unique, columns) in indexes.items():
+                if index_name in existing:
+                    continue
+                cols = ", ".join(f"`{col}`" for col in columns)
+                conn.execute(text(f"ALTER TABLE `{shadow}` ADD {'UNIQUE ' if unique else ''}INDEX `{index_name}` ({cols})"))
+
+            state = conn.execute(text(
+                "SELECT chunk_offset, status FROM load_state WHERE source_object = :source_object AND table_name = :shadow"
+            ), {"source_object": source_object, "shadow": shadow}).fetchone()
+            live_keys = {tuple(str(v) for v in row) for row in conn.execute(text(f"SELECT {key_cols} FROM `{table_name}`"))}
+            shadow_count = conn.execute(text(f"SELECT COUNT(*) FROM `{shadow}`")).scalar()
+
+        if not df.empty and (state is None or state[1] != "done" or state[0] != len(df)):
+            logging.error(f"Validación de '{shadow}' fallida: la carga no terminó ({state} frente a {len(df)} filas).")
+            return False
+
+        df_keys = {tuple(str(v) for v in row) for row in df[keys].itertuples(index=False)} if not df.empty else set()
+        expected_count = seeded_count + len(df_keys - live_keys)
+        if shadow_count < expected_count:
+            logging.error(
+                f"Validación de '{shadow}' fallida: {shadow_count} filas frente a al menos {expected_count} esperadas."
+            )
+            return False
+        logging.info(f"Tabla sombra '{shadow}' validada: {seeded_count} -> {shadow_count} filas.")
+        return True
+    except Exception as e:
+        logging.error(f"Error al finalizar la tabla sombra '{shadow}': {e}")
+        return False
+
+def publish_shadow_tables(engine, table_names: list) -> bool:
+    """
+    Publica todas las tablas sombra con un único RENAME TABLE atómico. La versión
+    anterior de cada tabla queda como '<tabla>__prev' para un rollback inmediato.
+
+    El '__prev' existente se aparta como '<tabla>__old' dentro del mismo RENAME y
+    solo se elimina después de que el swap tuvo éxito: si el RENAME falla, la
+    copia de rollback sigue intacta.
+    """
+    try:
+        with engine.begin() as conn:
+            renames = []
+            for table_name in table_names:
+                previous = f"{table_name}{PREVIOUS_SUFFIX}"
+                old = f"{table_name}__old"
+                # Un '__old' solo puede quedar de un swap anterior ya publicado.
+                conn.execute(text(f"DROP TABLE IF EXISTS `{old}`"))
+                has_previous = conn.execute(text(
+                    "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = :previous"
+                ), {"previous": previous}).scalar()
+                if has_previous:
+                    renames.append(f"`{previous}` TO `{old}`")
+                renames.append(f"`{table_name}` TO `{previous}`")
+                renames.append(f"`{table_name}{SHADOW_SUFFIX}` TO `{table_name}`")
+            conn.execute(text(f"RENAME TABLE {', '.join(renames)}"))
+            for table_name in table_names:
+                conn.execute(text(f"DROP TABLE IF EXISTS `{table_name}__old`"))
+        logging.info(f"Tablas publicadas con swap atómico: {', '.join(table_names)}. 🔁")
+        return True
+    except Exception as e:
+        logging.error(f"Error al publicar las tablas sombra: {e}")
+        return False
+
+def rollback_table_swap(engine, table_names: list) -> bool:
+    """
+    Revierte el último swap intercambiando cada tabla con su versión '<tabla>__prev'.
+    """
+    renames = []
+    for table_name in table_names:
+        tmp = f"{table_name}__rollback"
+        renames.append(f"`{table_name}` TO `{tmp}`")
+        renames.append(f"`{table_name}{PREVIOUS_SUFFIX}` TO `{table_name}`")
+        renames.append(f"`{tmp}` TO `{table_name}{PREVIOUS_SUFFIX}`")
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"RENAME TABLE {', '.join(renames)}"))
+        logging.info(f"Rollback completado para: {', '.join(table_names)}. ↩️")
+        return True
+    except Exception as e:
+        logging.error(f"Error al revertir el swap de tablas: {e}")
+        return False
+
 def read_data_from_gcs(bucket_name, file_path):
 
     
@@ -121,27 +422,99 @@ def read_data_from_gcs(bucket_name, file_path):
         logging.error(f"Error al leer datos de GCS ({file_path}): {e}")
         return None
 
-def load_dataframe_to_sql_pymysql(df: pd.DataFrame, table_name: str):
+def _prepare_load_frame(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    """
+    Ajusta el DataFrame a la tabla destino antes de cargarlo. La clave natural
+    de los POIs es el nombre normalizado, así que se descartan las filas sin nombre.
+    """
+    if table_name in ("atracciones_raw", "museos_raw") and not df.empty:
+        df = df[df["nombre"].notna()].copy()
+        df["nombre_normalizado"] = df["nombre"].map(normalize_name)
+    return df
+
+def _hash_rows(rows) -> str:
+    """Calcula un hash estable (SHA-256) de una lista de filas."""
+    payload = json.dumps(rows, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _get_load_state(cursor, source_object: str, table_name: str):
+    """Devuelve (chunk_offset, row_hash, status) de la última carga registrada, o None."""
+    cursor.execute(
+        "SELECT chunk_offset, row_hash, status FROM load_state WHERE source_object = %s AND table_name = %s",
+        (source_object, table_name)
+    )
+    return cursor.fetchone()
+
+def _save_load_state(cursor, source_object: str, table_name: str, chunk_offset: int, row_hash: str, status: str):
+    """Registra el progreso de la carga dentro de la transacción en curso."""
+    cursor.execute(
+        "INSERT INTO load_state (source_object, table_name, chunk_offset, row_hash, status, updated_at) "
+        "VALUES (%s, %s, %s, %s, %s, UTC_TIMESTAMP()) "
+        "ON DUPLICATE KEY UPDATE chunk_offset = VALUES(chunk_offset), row_hash = VALUES(row_hash), "
+        "status = VALUES(status), updated_at = VALUES(updated_at)",
+        (source_object, table_name, chunk_offset, row_hash, status)
+    )
+
+def _resume_offset(state, records, chunk_size: int) -> int:
+    """
+    Decide desde qué fila reanudar. Solo se reanuda si el hash del último chunk
+    confirmado coincide con las mismas filas del DataFrame actual; si no, el
+    origen cambió y la carga empieza desde cero.
+    """
+    if not state:
+        return 0
+    chunk_offset, row_hash, _ = state
+    if chunk_offset <= 0 or chunk_offset > len(records):
+        return 0
+    last_chunk_start = ((chunk_offset - 1) // chunk_size) * chunk_size
+    if _hash_rows(records[last_chunk_start:chunk_offset]) != row_hash:
+        return 0
+    return chunk_offset
+
+def load_dataframe_to_sql_pymysql(df: pd.DataFrame, table_name: str, source_object: str = None,
+                                  chunk_size: int = CHUNK_SIZE, target_table: str = None):
     """
     Carga un DataFrame en una tabla SQL usando el driver PyMySQL directamente,
     manejando NaN y estructuras anidadas.
+
+    Las tablas de referencia (ver NATURAL_KEYS) se cargan con upsert sobre su
+    clave natural; el resto usa INSERT IGNORE.
+
+    La carga se confirma en chunks de 'chunk_size' filas y el progreso se guarda
+    en 'load_state' (objeto de origen, offset y hash del chunk) en la misma
+    transacción. Si la carga se interrumpe, el siguiente intento reanuda desde
+    el último chunk confirmado.
+
+    'target_table' permite escribir en otra tabla (p. ej. la sombra del modo
+    swap) manteniendo la semántica de carga de 'table_name'.
     """
+    df = _prepare_load_frame(df, table_name)
+
     if df.empty:
         logging.warning(f"DataFrame '{table_name}' está vacío. No se cargará nada.")
         return True
+
+    source_object = source_object or table_name
+    target_table = target_table or table_name
     
+    # La fecha ya viene parseada si el DataFrame se leyó con el esquema de listados
+    if "last_review" in df.columns:
+        last_review = df["last_review"]
+        if not pd.api.types.is_datetime64_any_dtype(last_review):
+            last_review = pd.to_datetime(last_review, errors="coerce")
+        df = df.assign(last_review=last_review.dt.date)
+
     # Manejar NaNs de manera integral antes de cualquier otra manipulación
-    # Esto convertirá NaN y NaT a None, que es lo que MySQL necesita
+    # Esto convertirá NaN, NaT y NA a None, que es lo que MySQL necesita
     df_cleaned = df.astype(object).where(pd.notna(df), None)
-
-    if "last_review" in df_cleaned.columns:
-        df_cleaned["last_review"] = pd.to_datetime(df_cleaned["last_review"], errors="coerce").dt.date
-        df_cleaned["last_review"] = df_cleaned["last_review"].where(df_cleaned["last_review"].notna(), None)
     # Convertir diccionarios a cadenas JSON si existen
     for col in df_cleaned.columns:
         if isinstance(df_cleaned[col].iloc[0], (dict, list)):
             df_cleaned[col] = df_cleaned[col].apply(lambda x: json.dumps(x) if isinstance(x, (dict, list)) else x)
 
+    records_to_insert = [tuple(row) for row in df_cleaned.itertuples(index=False)]
+    total = len(records_to_insert)
+
     try:
         conn = pymysql.connect(
             host=os.getenv("DB_HOST"),
@@ -151,14 +524,32 @@ def load_dataframe_to_sql_pymysql(df: pd.DataFrame, table_name: str):
             port=int(os.getenv("DB_PORT"))
         )
         with conn.cursor() as cursor:
+            offset = _resume_offset(_get_load_state(cursor, source_object, target_table), records_to_insert, chunk_size)
+            if offset == total:
+                logging.info(f"La tabla '{target_table}' ya tiene cargado '{source_object}'. Se omite. ⏭️")
+                return True
+            if offset > 0:
+                logging.info(f"Reanudando la carga de '{target_table}' desde la fila {offset} de {total}.")
+
             cols = ", ".join([f"`{col}`" for col in df_cleaned.columns])
             vals = ", ".join(["%s"] * len(df_cleaned.columns))
-            sql = f"INSERT IGNORE INTO `{table_name}` ({cols}) VALUES ({vals})"
-            
-            records_to_insert = [tuple(row) for row in df_cleaned.itertuples(index=False)]
-            cursor.executemany(sql, records_to_insert)
-            conn.commit()
-        logging.info(f"Datos cargados correctamente en la tabla '{table_name}' con PyMySQL. 🎉")
+            if table_name in NATURAL_KEYS:
+                updates = ", ".join(
+                    f"`{col}` = VALUES(`{col}`)" for col in df_cleaned.columns if col not in NATURAL_KEYS[table_name]
+                )
+                sql = f"INSERT INTO `{target_table}` ({cols}) VALUES ({vals}) ON DUPLICATE KEY UPDATE {updates}"
+            else:
+                sql = f"INSERT IGNORE INTO `{target_table}` ({cols}) VALUES ({vals})"
+
+            while offset < total:
+                chunk = records_to_insert[offset:offset + chunk_size]
+                cursor.executemany(sql, chunk)
+                offset += len(chunk)
+                status = "done" if offset == total else "in_progress"
+                _save_load_state(cursor, source_object, target_table, offset, _hash_rows(chunk), status)
+                conn.commit()
+                logging.info(f"   '{target_table}': {offset}/{total} filas confirmadas.")
+        logging.info(f"Datos cargados correctamente en la tabla '{target_table}' con PyMySQL. 🎉")
         return True
     except Exception as e:
         logging.error(f"Error al cargar DataFrame '{table_name}' en SQL con PyMySQL: {e}")
@@ -167,42 +558,62 @@ def load_dataframe_to_sql_pymysql(df: pd.DataFrame, table_name: str):
         if 'conn' in locals() and conn.open:
             conn.close()
 
-def run_pipeline() -> bool:
+def build_dataframe(key: str, data) -> pd.DataFrame:
+    """
+    Convierte los datos crudos ya parseados de una fuente en el DataFrame que se
+    carga en su tabla. Lo usan tanto la lectura desde GCS como el spool local.
+    """
+    if key == 'bcra':
+        df_bcra = pd.DataFrame(data['results']['detalle'])
+        df_bcra['fecha'] = pd.to_datetime(data['results']['fecha']).date()
+        return df_bcra
+    return pd.DataFrame(data)
+
+def run_pipeline(load_mode: str = None, dataframes: dict = None, source_objects: dict = None) -> bool:
     """
     Orquesta y ejecuta el pipeline de carga a la base de datos.
+
+    Con load_mode='swap' (o LOAD_MODE=swap) las tablas se cargan en sombras y
+    se publican juntas solo si todas se cargaron y validaron correctamente.
+
+    Si se pasan 'dataframes' (claves 'bcra', 'nyc', 'atracciones', 'museos'),
+    se cargan directamente sin leer de GCS; 'source_objects' indica el origen
+    de cada uno para los checkpoints de load_state.
     """
+    load_mode = (load_mode or LOAD_MODE).lower()
     engine = None
     try:
         logging.info("=== Iniciando el pipeline de datos (EL) para Cloud SQL ===")
-        now = datetime.now(timezone.utc)
-        bucket_name = "proyecto-integrador"
-
-        paths = {
-            "bcra": f"raw/bcra_api/{now.year}/{now.month:02d}/{now.day:02d}/bcra_api.json",
-            "nyc": f"raw/nyc_csv_file/{now.year}/{now.month:02d}/{now.day:02d}/nyc_csv_file.csv",
-            "atracciones": f"raw/atracciones_web_scrapping/{now.year}/{now.month:02d}/{now.day:02d}/atracciones_web_scrapping.json",
-            "museos": f"raw/museos_web_scrapping/{now.year}/{now.month:02d}/{now.day:02d}/museos_web_scrapping.json"
-        }
-
-        dataframes = {}
-        for key, path in paths.items():
-            data = read_data_from_gcs(bucket_name, path)
-            if data is None:
-                logging.error(f"No se pudo leer '{key}' desde GCS. Pipeline detenido.")
-                return False
-            
-            if path.endswith('.json'):
-                json_data = json.loads(data)
-                if key == 'bcra':
-                    df_bcra = pd.DataFrame(json_data['results']['detalle'])
-                    df_bcra['fecha'] = pd.to_datetime(json_data['results']['fecha']).date()
-                    dataframes[key] = df_bcra
-                else:
-                    dataframes[key] = pd.DataFrame(json_data)
-            elif path.endswith('.csv'):
-                dataframes[key] = pd.read_csv(io.StringIO(data))
-        
-        logging.info("Dataframes creados con éxito a partir de los datos de GCS.")
+
+        if dataframes is None:
+            now = datetime.now(timezone.utc)
+            bucket_name = "proyecto-integrador"
+
+            paths = {
+                "bcra": f"raw/bcra_api/{now.year}/{now.month:02d}/{now.day:02d}/bcra_api.json",
+                "nyc": f"raw/nyc_csv_file/{now.year}/{now.month:02d}/{now.day:02d}/nyc_csv_file.csv",
+                "atracciones": f"raw/atracciones_web_scrapping/{now.year}/{now.month:02d}/{now.day:02d}/atracciones_web_scrapping.json",
+                "museos": f"raw/museos_web_scrapping/{now.year}/{now.month:02d}/{now.day:02d}/museos_web_scrapping.json"
+            }
+
+            dataframes = {}
+            for key, path in paths.items():
+                data = read_data_from_gcs(bucket_name, path)
+                if data is None:
+                    logging.error(f"No se pudo leer '{key}' desde GCS. Pipeline detenido.")
+                    return False
+
+                if path.endswith('.json'):
+                    dataframes[key] = build_dataframe(key, json.loads(data))
+                elif path.endswith('.csv'):
+                    dataframes[key] = read_listings_csv(io.StringIO(data))
+
+            # Cada tabla se identifica por su objeto de origen en GCS, de modo que un
+            # reintento omite las tablas ya cargadas y reanuda la que quedó a medias.
+            source_objects = {key: f"gs://{bucket_name}/{path}" for key, path in paths.items()}
+            logging.info("Dataframes creados con éxito a partir de los datos de GCS.")
+
+        source_objects = source_objects or {}
 
         engine = get_db_connection()
         if not engine:
@@ -211,13 +622,31 @@ def run_pipeline() -> bool:
 
         if not create_all_tables(engine):
             return False
+
+        if not compact_reference_tables(engine):
+            return False
             
         success = True
         
-        if not load_dataframe_to_sql_pymysql(dataframes['bcra'], "bcra_raw"): success = False
-        if not load_dataframe_to_sql_pymysql(dataframes['nyc'], "nyc_raw"): success = False
-        if not load_dataframe_to_sql_pymysql(dataframes['atracciones'], "atracciones_raw"): success = False
-        if not load_dataframe_to_sql_pymysql(dataframes['museos'], "museos_raw"): success = False
+        tables = {"bcra": "bcra_raw", "nyc": "nyc_raw", "atracciones": "atracciones_raw", "museos": "museos_raw"}
+        for key, table_name in tables.items():
+            if key not in dataframes:
+                logging.error(f"No hay datos para '{key}'. No se cargará la tabla '{table_name}'.")
+                success = False
+                continue
+            source_object = source_objects.get(key, table_name)
+            if load_mode == "swap":
+                indexes, seeded_count = prepare_shadow_table(engine, table_name, source_object)
+                if indexes is None:
+                    success = False
+                    continue
+                shadow = f"{table_name}{SHADOW_SUFFIX}"
+                if not load_dataframe_to_sql_pymysql(dataframes[key], table_name, source_object, target_table=shadow): success = False
+                elif not finalize_shadow_table(engine, table_name, indexes, seeded_count, dataframes[key], source_object): success = False
+            elif not load_dataframe_to_sql_pymysql(dataframes[key], table_name, source_object): success = False
+
+        if success and load_mode == "swap":
+            success = publish_shadow_tables(engine, list(tables.values()))
 
         if success:
             logging.info("Carga de datos finalizada correctamente. ✅")
@@ -0,0 +1,353 @@
+# Módulo para cargar los archivos crudos en una base DuckDB local
+import os
+import json
+import argparse
+import logging
+import tempfile
+import duckdb
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Ruta por defecto del archivo DuckDB. Debe coincidir con el target 'local' de profiles.yml.
+DUCKDB_PATH = os.environ.get("DUCKDB_PATH", "pipeline_db.duckdb")
+
+# Esquema de cada tabla cruda, tal como se declara en models/staging/sources.yml.
+SOURCE_SCHEMAS = {
+    "nyc_raw": "pipeline_db",
+    "bcra_raw": "public",
+    "atracciones_raw": "public",
+    "museos_raw": "public",
+}
+
+# Definición de las tablas crudas, equivalente a create_all_tables() de load_data.py.
+TABLE_DDL = {
+    "nyc_raw": """
+        id BIGINT PRIMARY KEY,
+        name TEXT,
+        host_id BIGINT,
+        host_name VARCHAR(255),
+        neighbourhood_group VARCHAR(255),
+        neighbourhood VARCHAR(255),
+        latitude DECIMAL(10, 8),
+        longitude DECIMAL(11, 8),
+        room_type VARCHAR(255),
+        price DECIMAL(10, 2),
+        minimum_nights INTEGER,
+        number_of_reviews INTEGER,
+        last_review DATE,
+        reviews_per_month DECIMAL(10, 2),
+        calculated_host_listings_count INTEGER,
+        availability_365 INTEGER
+    """,
+    "bcra_raw": """
+        fecha DATE,
+        tipoMoneda VARCHAR(255),
+        descripcion TEXT,
+        codigoMoneda VARCHAR(255),
+        tipoPase DECIMAL(18, 8),
+        tipoCotizacion DECIMAL(18, 8),
+        compra DECIMAL(18, 8),
+        venta DECIMAL(18, 8),
+        PRIMARY KEY (fecha, codigoMoneda)
+    """,
+    "atracciones_raw": """
+        nombre VARCHAR(255),
+        url TEXT,
+        direccion TEXT,
+        latitude DECIMAL(10, 8),
+        longitude DECIMAL(11, 8),
+        nombre_normalizado VARCHAR(255) PRIMARY KEY
+    """,
+    "museos_raw": """
+        nombre VARCHAR(255),
+        url TEXT,
+        direccion TEXT,
+        latitude DECIMAL(10, 8),
+        longitude DECIMAL(11, 8),
+        nombre_normalizado VARCHAR(255) PRIMARY KEY
+    """,
+}
+
+# Clave de cada tabla cruda. Define cómo se resuelven los duplicados al cargar;
+# las tablas sin clave se cargan con un INSERT simple.
+TABLE_KEYS = {
+    "nyc_raw": ["id"],
+    "bcra_raw": ["fecha", "codigoMoneda"],
+    "atracciones_raw": ["nombre_normalizado"],
+    "museos_raw": ["nombre_normalizado"],
+}
+
+NYC_COLUMNS = [
+    "id", "name", "host_id", "host_name", "neighbourhood_group", "neighbourhood",
+    "latitude", "longitude", "room_type", "price", "minimum_nights",
+    "number_of_reviews", "last_review", "reviews_per_month",
+    "calculated_host_listings_count", "availability_365",
+]
+
+SCRAPING_COLUMNS = ["nombre", "url", "direccion", "latitude", "longitude"]
+
+# Columnas que produce la consulta de cada archivo de referencia (ver _source_query);
+# son las que se actualizan en el upsert.
+UPSERT_COLUMNS = {
+    "bcra_raw": ["fecha", "codigoMoneda", "descripcion", "tipoPase", "tipoCotizacion"],
+    "atracciones_raw": SCRAPING_COLUMNS + ["nombre_normalizado"],
+    "museos_raw": SCRAPING_COLUMNS + ["nombre_normalizado"],
+}
+
+# Equivalente en DuckDB de normalize_name() de load_data.py.
+NORMALIZED_NAME_SQL = "LOWER(TRIM(REGEXP_REPLACE(nombre, '\\s+', ' ', 'g')))"
+
+
+def _sql_literal(value: str) -> str:
+    """Escapa una cadena para usarla como literal SQL (rutas de archivos)."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def catalog_name(db_path: str) -> str:
+    """
+    Nombre del catálogo que DuckDB asigna al archivo (su nombre sin extensión).
+    Como el archivo se llama igual que el esquema 'pipeline_db', las tablas se
+    referencian siempre con nombre completo para evitar la ambigüedad.
+    """
+    return os.path.splitext(os.path.basename(db_path))[0]
+
+
+def qualified_name(catalog: str, table_name: str) -> str:
+    """Devuelve "<catálogo>"."<esquema>"."<tabla>" para una tabla cruda."""
+    return f'"{catalog}"."{SOURCE_SCHEMAS[table_name]}"."{table_name}"'
+
+
+def get_duckdb_connection(db_path: str = DUCKDB_PATH):
+    """
+    Abre (o crea) la base DuckDB local.
+
+    Retorna una conexión de DuckDB o 'None' si falla.
+    """
+    try:
+        conn = duckdb.connect(db_path)
+        logging.info(f"Conexión a DuckDB establecida: {db_path}")
+        return conn
+    except Exception as e:
+        logging.error(f"Error al abrir la base DuckDB '{db_path}': {e}")
+        return None
+
+
+def create_all_tables_duckdb(conn, catalog: str) -> bool:
+    """
+    Crea los esquemas y las tablas crudas en DuckDB si no existen.
+    """
+    try:
+        for table_name, ddl in TABLE_DDL.items():
+            schema = SOURCE_SCHEMAS[table_name]
+            conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{catalog}"."{schema}"')
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {qualified_name(catalog, table_name)} ({ddl})")
+        logging.info("Tablas crudas creadas en DuckDB. ✨")
+        return True
+    except Exception as e:
+        logging.error(f"Error al crear las tablas en DuckDB: {e}")
+        return False
+
+
+def _source_query(table_name: str, file_path: str) -> str:
+    """
+    Construye la consulta que lee un archivo crudo con los lectores nativos de
+    DuckDB y lo proyecta a las columnas de la tabla destino.
+    """
+    path = _sql_literal(file_path)
+
+    if table_name == "nyc_raw":
+        cols = ", ".join(NYC_COLUMNS)
+        return f"SELECT {cols} FROM read_csv_auto({path}, header = true)"
+
+    if table_name == "bcra_raw":
+        # El JSON de la API trae la fecha en 'results' y las cotizaciones en 'results.detalle'.
+        return f"""
+            WITH detalle AS (
+                SELECT
+                    CAST(j.results.fecha AS DATE) AS fecha,
+                    UNNEST(j.results.detalle) AS d
+                FROM read_json_auto({path}) AS j
+            ),
+            cotizaciones AS (
+                SELECT
+                    fecha,
+                    struct_extract(d, 'codigoMoneda') AS codigoMoneda,
+                    struct_extract(d, 'descripcion') AS descripcion,
+                    struct_extract(d, 'tipoPase') AS tipoPase,
+                    struct_extract(d, 'tipoCotizacion') AS tipoCotizacion
+                FROM detalle
+            )
+            SELECT DISTINCT ON (fecha, codigoMoneda) *
+            FROM cotizaciones
+            WHERE fecha IS NOT NULL AND codigoMoneda IS NOT NULL
+        """
+
+    cols = ", ".join(SCRAPING_COLUMNS)
+    return f"""
+        SELECT DISTINCT ON (nombre_normalizado) *
+        FROM (SELECT {cols}, {NORMALIZED_NAME_SQL} AS nombre_normalizado FROM read_json_auto({path}))
+        WHERE nombre_normalizado IS NOT NULL
+    """
+
+
+def _insert_statement(table_name: str, target: str) -> str:
+    """
+    Arma el INSERT según la clave de la tabla: 'nyc_raw' ignora los id
+    duplicados, las tablas de referencia hacen upsert y las tablas sin clave
+    usan un INSERT simple (ON CONFLICT no es válido sin clave en DuckDB).
+    """
+    if not TABLE_KEYS.get(table_name):
+        return f"INSERT INTO {target} BY NAME"
+    if table_name == "nyc_raw":
+        return f"INSERT OR IGNORE INTO {target} BY NAME"
+    return f"INSERT INTO {target} BY NAME"
+
+
+def _conflict_clause(table_name: str) -> str:
+    """
+    Cláusula ON CONFLICT del upsert de las tablas de referencia. DuckDB exige el
+    destino explícito cuando la clave tiene más de una columna.
+    """
+    keys = TABLE_KEYS.get(table_name)
+    if not keys or table_name == "nyc_raw":
+        return ""
+    updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in UPSERT_COLUMNS[table_name] if col not in keys)
+    return f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+
+
+def load_file_to_duckdb(conn, file_path: str, table_name: str, catalog: str) -> bool:
+    """
+    Carga un archivo crudo (CSV o JSON) directamente en su tabla de DuckDB,
+    sin pasar por pandas. Igual que en la carga a Cloud SQL, las tablas de
+    referencia se cargan con upsert sobre su clave natural y en 'nyc_raw' las
+    filas con id duplicado se ignoran.
+    """
+    if not os.path.exists(file_path):
+        logging.error(f"No se encontró el archivo '{file_path}' para la tabla '{table_name}'.")
+        return False
+
+    target = qualified_name(catalog, table_name)
+    try:
+        conn.execute(
+            f"{_insert_statement(table_name, target)} {_source_query(table_name, file_path)} {_conflict_clause(table_name)}"
+        )
+        total = conn.execute(f"SELECT COUNT(*) FROM {target}").fetchone()[0]
+        logging.info(f"Archivo '{file_path}' cargado en '{target}' ({total} filas). 🎉")
+        return True
+    except Exception as e:
+        logging.error(f"Error al cargar '{file_path}' en '{target}': {e}")
+        return False
+
+
+def run_duckdb_pipeline(files: dict, db_path: str = DUCKDB_PATH) -> bool:
+    """
+    Orquesta la carga local: crea las tablas y llena cada una desde su archivo.
+
+    'files' mapea el nombre de la tabla cruda (p. ej. 'nyc_raw') a la ruta del archivo.
+    """
+    logging.info("=== Iniciando la carga local a DuckDB ===")
+    conn = get_duckdb_connection(db_path)
+    if conn is None:
+        return False
+
+    catalog = catalog_name(db_path)
+    try:
+        if not create_all_tables_duckdb(conn, catalog):
+            return False
+
+        success = True
+        for table_name, file_path in files.items():
+            if table_name not in TABLE_DDL:
+                logging.error(f"Tabla desconocida: {table_name}")
+                success = False
+                continue
+            if not load_file_to_duckdb(conn, file_path, table_name, catalog):
+                success = False
+
+        if success:
+            logging.info("Carga local a DuckDB finalizada correctamente. ✅")
+        else:
+            logging.error("Carga local a DuckDB con errores. ❌")
+        return success
+    finally:
+        conn.close()
+
+
+def run_smoke_test() -> bool:
+    """
+    Prueba rápida del cargador: escribe archivos de muestra en una carpeta
+    temporal, los carga dos veces en un 'pipeline_db.duckdb' nuevo y verifica
+    que la segunda carga no duplique filas.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = {
+            "nyc_raw": os.path.join(tmp_dir, "AB_NYC.csv"),
+            "bcra_raw": os.path.join(tmp_dir, "bcra_api.json"),
+            "atracciones_raw": os.path.join(tmp_dir, "atracciones_web_scrapping.json"),
+            "museos_raw": os.path.join(tmp_dir, "museos_web_scrapping.json"),
+        }
+        with open(files["nyc_raw"], "w", encoding="utf-8") as f:
+            f.write(",".join(NYC_COLUMNS) + "\n")
+            f.write("2539,Clean & quiet apt,2787,John,Brooklyn,Kensington,40.64749,-73.97237,Private room,149,1,9,2018-10-19,0.21,6,365\n")
+            f.write("2595,Skylit Midtown Castle,2845,Jennifer,Manhattan,Midtown,40.75362,-73.98377,Entire home/apt,225,1,45,2019-05-21,0.38,2,355\n")
+            f.write("3647,THE VILLAGE OF HARLEM,4632,Elisabeth,Manhattan,Harlem,40.80902,-73.9419,Private room,150,3,0,,,1,365\n")
+        with open(files["bcra_raw"], "w", encoding="utf-8") as f:
+            json.dump({"status": 200, "results": {"fecha": "2025-09-01", "detalle": [
+                {"codigoMoneda": "USD", "descripcion": "DOLAR E.E.U.U.", "tipoPase": 1.0, "tipoCotizacion": 1350.5},
+                {"codigoMoneda": "EUR", "descripcion": "EURO", "tipoPase": 1.17, "tipoCotizacion": 1580.2},
+            ]}}, f)
+        with open(files["atracciones_raw"], "w", encoding="utf-8") as f:
+            json.dump([
+                {"nombre": "Empire State Building", "url": "https://example.com/esb", "direccion": "20 W 34th St", "latitude": 40.748, "longitude": -73.985},
+                {"nombre": "Central Park", "url": "https://example.com/cp", "direccion": "N/A", "latitude": 40.785, "longitude": -73.968},
+            ], f)
+        with open(files["museos_raw"], "w", encoding="utf-8") as f:
+            json.dump([
+                {"nombre": "Museo del Barrio", "url": "https://example.com/mdb", "direccion": "1230 5th Ave", "latitude": 40.793, "longitude": -73.951},
+                {"nombre": "museo  del barrio ", "url": "https://example.com/mdb", "direccion": "1230 5th Ave", "latitude": 40.793, "longitude": -73.951},
+            ], f)
+
+        db_path = os.path.join(tmp_dir, "pipeline_db.duckdb")
+        expected = {"nyc_raw": 3, "bcra_raw": 2, "atracciones_raw": 2, "museos_raw": 1}
+        for _ in range(2):
+            if not run_duckdb_pipeline(files, db_path):
+                return False
+
+        conn = duckdb.connect(db_path)
+        try:
+            catalog = catalog_name(db_path)
+            counts = {
+                table: conn.execute(f"SELECT COUNT(*) FROM {qualified_name(catalog, table)}").fetchone()[0]
+                for table in expected
+            }
+        finally:
+            conn.close()
+
+    if counts != expected:
+        logging.error(f"Prueba de humo fallida: se esperaban {expected} filas y se obtuvieron {counts}.")
+        return False
+    logging.info("Prueba de humo del cargador DuckDB completada. ✅")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga los archivos crudos en una base DuckDB local.")
+    parser.add_argument("--db", default=DUCKDB_PATH, help="Ruta del archivo DuckDB.")
+    parser.add_argument("--nyc", help="CSV de Airbnb NYC (AB_NYC.csv).")
+    parser.add_argument("--bcra", help="JSON de la API del BCRA.")
+    parser.add_argument("--atracciones", help="JSON de atracciones scrapeadas.")
+    parser.add_argument("--museos", help="JSON de museos scrapeados.")
+    parser.add_argument("--smoke", action="store_true", help="Ejecuta la prueba de humo con archivos de muestra.")
+    args = parser.parse_args()
+
+    if args.smoke:
+        raise SystemExit(0 if run_smoke_test() else 1)
+
+    input_files = {
+        "nyc_raw": args.nyc,
+        "bcra_raw": args.bcra,
+        "atracciones_raw": args.atracciones,
+        "museos_raw": args.museos,
+    }
+    input_files = {table: path for table, path in input_files.items() if path}
+    raise SystemExit(0 if run_duckdb_pipeline(input_files, args.db) else 1)
@@ -0,0 +1,96 @@
+# Módulo para el spool local: entrega directa de la extracción a la carga
+import os
+import shutil
+import logging
+import pandas as pd
+from datetime import datetime, timezone
+from .load_data import build_dataframe
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Carpeta base del spool. Cada ejecución escribe en una subcarpeta con la fecha del día.
+SPOOL_DIR = os.environ.get("SPOOL_DIR", "./spool")
+
+# Relación entre el nombre de la fuente en la extracción y la clave que usa run_pipeline().
+SOURCE_TO_LOAD_KEY = {
+    'bcra_api': 'bcra',
+    'csv_file': 'nyc',
+    'web_scraping_atracciones': 'atracciones',
+    'web_scraping_museos': 'museos',
+}
+
+
+def get_spool_path(base_dir: str = SPOOL_DIR) -> str:
+    """Devuelve la carpeta del spool para el día de hoy (UTC)."""
+    now = datetime.now(timezone.utc)
+    return os.path.join(base_dir, f"{now.year}", f"{now.month:02d}", f"{now.day:02d}")
+
+
+def write_to_spool(source: str, data, spool_path: str):
+    """
+    Escribe una fuente ya validada en el spool como Parquet, conservando los
+    tipos del DataFrame para que la carga no tenga que volver a parsear.
+
+    Los listados llegan como el DataFrame tipado del extractor y se escriben
+    tal cual; las fuentes JSON se convierten una única vez con build_dataframe().
+
+    Retorna la ruta del archivo escrito o 'None' si falla.
+    """
+    key = SOURCE_TO_LOAD_KEY.get(source)
+    if key is None:
+        logging.error(f"Fuente desconocida para el spool: {source}")
+        return None
+    try:
+        os.makedirs(spool_path, exist_ok=True)
+        df = data if isinstance(data, pd.DataFrame) else build_dataframe(key, data)
+        file_path = os.path.join(spool_path, f"{key}.parquet")
+        df.to_parquet(file_path, index=False)
+        logging.info(f"Fuente '{source}' escrita en el spool: {file_path} ({len(df)} filas).")
+        return file_path
+    except Exception as e:
+        logging.error(f"Error al escribir '{source}' en el spool: {e}")
+        return None
+
+
+def prune_spool(current_path: str, base_dir: str = SPOOL_DIR) -> bool:
+    """
+    Elimina las carpetas diarias del spool distintas de 'current_path'. Se
+    llama después de una carga exitosa; el día actual se conserva por si la
+    ejecución se repite.
+    """
+    current_path = os.path.abspath(current_path)
+    try:
+        for year in os.listdir(base_dir):
+            year_path = os.path.join(base_dir, year)
+            if not os.path.isdir(year_path):
+                continue
+            for month in os.listdir(year_path):
+                month_path = os.path.join(year_path, month)
+                if not os.path.isdir(month_path):
+                    continue
+                for day in os.listdir(month_path):
+                    day_path = os.path.join(month_path, day)
+                    if os.path.isdir(day_path) and os.path.abspath(day_path) != current_path:
+                        shutil.rmtree(day_path)
+                        logging.info(f"Carpeta del spool eliminada: {day_path}")
+                if not os.listdir(month_path):
+                    os.rmdir(month_path)
+            if not os.listdir(year_path):
+                os.rmdir(year_path)
+        return True
+    except Exception as e:
+        logging.error(f"Error al limpiar el spool en {base_dir}: {e}")
+        return False
+
+
+def read_spool(spool_files: dict) -> dict:
+    """
+    Lee los archivos del spool ({clave: ruta}) y devuelve {clave: DataFrame}.
+    """
+    dataframes = {}
+    for key, file_path in spool_files.items():
+        try:
+            dataframes[key] = pd.read_parquet(file_path)
+        except Exception as e:
+            logging.error(f"Error al leer '{file_path}' del spool: {e}")
+    return dataframes
@@ -14,12 +14,21 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Usa os.environ.get para manejar el caso en que la variable no exista.
 GOOGLE_BUCKET_NAME = os.environ.get("GOOGLE_BUCKET_NAME")
 
+# Nombre con el que se guarda cada fuente en GCS.
+GCS_NAME_MAP = {
+    'csv_file': 'nyc_csv_file',
+    'bcra_api': 'bcra_api',
+    'web_scraping_atracciones': 'atracciones_web_scrapping',
+    'web_scraping_museos': 'museos_web_scrapping'
+}
+
 def validate_data_quality(data, source_name):
     """
     Realiza validaciones de calidad, completitud y coherencia para
     cada fuente de datos.
     """
-    if not data:
+    # Los listados llegan como DataFrame tipado; el resto de las fuentes como dict o lista
+    if data is None or (isinstance(data, pd.DataFrame) and data.empty) or (not isinstance(data, pd.DataFrame) and not data):
         logging.error(f"Validación fallida para {source_name}: los datos están vacíos o son nulos.")
         return False
     
@@ -37,12 +46,11 @@ def validate_data_quality(data, source_name):
             return False
         
     elif source_name == 'csv_file':
-        # Para el archivo CSV, la validación debe ser diferente
-        if not isinstance(data, list) or not data:
-            logging.error(f"Validación fallida para {source_name}: los datos no son una lista o están vacíos.")
+        # Para el archivo CSV, la validación debe ser diferente: se recibe el DataFrame del extractor
+        if not isinstance(data, pd.DataFrame):
+            logging.error(f"Validación fallida para {source_name}: los datos no son un DataFrame.")
             return False
-        sample_record = data[0]
-        if not all(k in sample_record for k in ['price', 'neighbourhood']):
+        if not all(k in data.columns for k in ['price', 'neighbourhood']):
             logging.error(f"Validación de completitud fallida para {source_name}: faltan campos en los registros.")
             return False
         
@@ -91,7 +99,8 @@ def upload_to_gcs(bucket_name, data, source_name, gcs_file_name=None):
             else:
                 df = data
                 
-            csv_data = df.to_csv(index=False)
+            # '%.15g' escribe los flotantes sin ruido ni '.0' sobrante (149 y no 149.0)
+            csv_data = df.to_csv(index=False, float_format='%.15g')
             blob = bucket.blob(file_path)
             blob.upload_from_string(csv_data, content_type='text/csv')
             
@@ -117,13 +126,7 @@ def run_validation_and_load(extracted_data):
             logging.error(f"Proceso detenido debido a un error de validación en la fuente: {source}")
             continue
         
-        gcs_name_map = {
-            'csv_file': 'nyc_csv_file',
-            'bcra_api': 'bcra_api',
-            'web_scraping_atracciones': 'atracciones_web_scrapping',
-            'web_scraping_museos': 'museos_web_scrapping'
-        }
-        final_name = gcs_name_map.get(source, source)
+        final_name = GCS_NAME_MAP.get(source, source)
 
         if not upload_to_gcs(GOOGLE_BUCKET_NAME, data, source, final_name):
             logging.error(f"Proceso detenido debido a un error de carga en la fuente: {source}")
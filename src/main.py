@@ -1,6 +1,8 @@
 # src/advance_1/main.py
 
+import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import pandas as pd
 
@@ -9,13 +11,64 @@ load_dotenv()
 
 # Importa las funciones de los módulos del pipeline
 from .extraction.extract_data import run_extraction_pipeline
-from .load.validate_and_load_gcs import run_validation_and_load
+from .load.validate_and_load_gcs import run_validation_and_load, validate_data_quality, upload_to_gcs, GCS_NAME_MAP, GOOGLE_BUCKET_NAME
 from .load.load_data import run_pipeline
+from .load.spool import get_spool_path, write_to_spool, read_spool, prune_spool, SOURCE_TO_LOAD_KEY
 
 # Configuración de logging para todo el pipeline
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def main():
+# Modo de entrega directa: la carga a Cloud SQL lee del spool local en lugar de GCS.
+HANDOFF_MODE = os.getenv("HANDOFF_MODE", "False").lower() == "true"
+
+def run_handoff_pipeline() -> bool:
+    """
+    Pipeline con entrega directa entre extracción y carga.
+
+    Cada fuente validada se escribe una sola vez en el spool local (Parquet) y
+    la carga a Cloud SQL lee desde ahí. La subida a GCS se ejecuta en paralelo
+    como archivo histórico, fuera del camino crítico.
+    """
+    logging.info(">> Paso 1: Iniciando extracción de datos (entrega directa)...")
+    extracted_data = run_extraction_pipeline(upload=False)
+    if not extracted_data:
+        logging.error("La extracción no produjo datos. Terminando el pipeline.")
+        return False
+
+    spool_path = get_spool_path()
+    spool_files = {}
+    uploads = {}
+
+    with ThreadPoolExecutor(max_workers=len(extracted_data)) as executor:
+        logging.info(f">> Paso 2: Escribiendo el spool en {spool_path} y subiendo a GCS en segundo plano...")
+        for source, data in extracted_data.items():
+            if not validate_data_quality(data, source):
+                logging.error(f"Fuente descartada por error de validación: {source}")
+                continue
+            file_path = write_to_spool(source, data, spool_path)
+            if file_path is None:
+                return False
+            spool_files[SOURCE_TO_LOAD_KEY[source]] = file_path
+            uploads[source] = executor.submit(
+                upload_to_gcs, GOOGLE_BUCKET_NAME, data, source, GCS_NAME_MAP.get(source, source)
+            )
+
+        logging.info(">> Paso 3: Iniciando carga a Cloud SQL desde el spool...")
+        loaded = run_pipeline(dataframes=read_spool(spool_files), source_objects=spool_files)
+
+        failed_uploads = [source for source, future in uploads.items() if not future.result()]
+
+    if failed_uploads:
+        logging.error(f"Falló la subida a GCS de: {', '.join(failed_uploads)}")
+    if not loaded:
+        logging.error("Carga a Cloud SQL fallida. Terminando el pipeline.")
+        return False
+
+    # Con la carga confirmada, los días anteriores del spool ya no hacen falta
+    prune_spool(spool_path)
+    return not failed_uploads
+
+def main(handoff: bool = HANDOFF_MODE):
     """
     Función principal que orquesta el pipeline ELT completo.
     """
@@ -23,6 +76,18 @@ def main():
     logging.info("= Iniciando pipeline ELT de datos      =")
     logging.info("========================================")
 
+    if handoff:
+        try:
+            if not run_handoff_pipeline():
+                return
+        except Exception as e:
+            logging.error(f"Error fatal en el pipeline con entrega directa: {e}")
+            return
+        logging.info("========================================")
+        logging.info("= Pipeline ELT finalizado con éxito    =")
+        logging.info("========================================")
+        return
+
     try:
        logging.info(">> Paso 1: Iniciando extracción de datos...")
        extracted_data = run_extraction_pipeline()
@@ -0,0 +1,246 @@
+# Módulo para perfilar las ejecuciones de dbt y detectar regresiones de rendimiento
+import os
+import json
+import argparse
+import logging
+import pandas as pd
+from sqlalchemy import MetaData, Table, Column, String, Integer, BigInteger, Float, Boolean, DateTime, Text, text
+from ..load.load_data import get_db_connection
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Carpeta 'target' del proyecto dbt, donde quedan run_results.json y manifest.json.
+DBT_TARGET_PATH = os.environ.get(
+    "DBT_TARGET_PATH",
+    os.path.join(os.path.dirname(__file__), "nyc_data_warehouse", "target")
+)
+
+# Un modelo se considera regresión si tarda más de THRESHOLD veces su línea base
+# y además al menos MIN_SECONDS segundos más (evita falsos positivos en modelos rápidos).
+REGRESSION_THRESHOLD = float(os.getenv("DBT_REGRESSION_THRESHOLD", "1.5"))
+REGRESSION_MIN_SECONDS = float(os.getenv("DBT_REGRESSION_MIN_SECONDS", "1.0"))
+# Cantidad de ejecuciones exitosas previas que forman la línea base móvil.
+BASELINE_WINDOW = int(os.getenv("DBT_BASELINE_WINDOW", "7"))
+# Cantidad de modelos más lentos para los que se guarda el plan de EXPLAIN.
+EXPLAIN_TOP_N = int(os.getenv("DBT_EXPLAIN_TOP_N", "3"))
+
+
+def create_history_table(engine):
+    """
+    Crea la tabla de historial de ejecuciones de dbt si no existe.
+    """
+    metadata = MetaData()
+
+    Table('dbt_run_history', metadata,
+        Column('invocation_id', String(64), primary_key=True),
+        Column('unique_id', String(255), primary_key=True),
+        Column('generated_at', DateTime),
+        Column('model_name', String(255)),
+        Column('layer', String(64)),
+        Column('materialization', String(32)),
+        Column('status', String(32)),
+        Column('execution_time', Float),
+        Column('rows_affected', BigInteger),
+        Column('baseline_time', Float),
+        Column('baseline_runs', Integer),
+        Column('regressed', Boolean),
+        Column('explain_plan', Text),
+    )
+
+    try:
+        metadata.create_all(engine)
+        return True
+    except Exception as e:
+        logging.error(f"Error al crear la tabla de historial de dbt: {e}")
+        return False
+
+
+def read_run_artifacts(target_path: str = DBT_TARGET_PATH):
+    """
+    Lee run_results.json y manifest.json de la carpeta 'target' de dbt.
+
+    Retorna una tupla (run_results, manifest) o (None, None) si faltan.
+    """
+    artifacts = []
+    for file_name in ("run_results.json", "manifest.json"):
+        file_path = os.path.join(target_path, file_name)
+        if not os.path.exists(file_path):
+            logging.error(f"No se encontró el artefacto de dbt: {file_path}")
+            return None, None
+        with open(file_path, encoding="utf-8") as f:
+            artifacts.append(json.load(f))
+    return artifacts[0], artifacts[1]
+
+
+def build_model_timings(run_results: dict, manifest: dict) -> pd.DataFrame:
+    """
+    Une los resultados de la ejecución con el manifest y devuelve un DataFrame
+    con una fila por modelo: tiempo, filas afectadas, capa y SQL compilado.
+    """
+    metadata = run_results.get("metadata", {})
+    nodes = manifest.get("nodes", {})
+
+    rows = []
+    for result in run_results.get("results", []):
+        unique_id = result.get("unique_id", "")
+        if not unique_id.startswith("model."):
+            continue
+        node = nodes.get(unique_id, {})
+        fqn = node.get("fqn", [])
+        adapter_response = result.get("adapter_response") or {}
+        rows.append({
+            "invocation_id": metadata.get("invocation_id"),
+            "unique_id": unique_id,
+            "generated_at": pd.to_datetime(metadata.get("generated_at")).tz_localize(None) if metadata.get("generated_at") else None,
+            "model_name": node.get("name", unique_id.split(".")[-1]),
+            # fqn = [proyecto, capa, ..., modelo]; la capa es staging, silver o gold.
+            "layer": fqn[1] if len(fqn) > 2 else None,
+            "materialization": node.get("config", {}).get("materialized"),
+            "status": result.get("status"),
+            "execution_time": result.get("execution_time"),
+            "rows_affected": adapter_response.get("rows_affected"),
+            "compiled_code": result.get("compiled_code") or node.get("compiled_code"),
+        })
+
+    return pd.DataFrame(rows)
+
+
+def attach_baselines(engine, timings: pd.DataFrame, window: int = BASELINE_WINDOW,
+                     threshold: float = REGRESSION_THRESHOLD, min_seconds: float = REGRESSION_MIN_SECONDS) -> pd.DataFrame:
+    """
+    Calcula la línea base de cada modelo (mediana de sus últimas 'window'
+    ejecuciones exitosas anteriores en el historial) y marca las regresiones.
+    """
+    # Se excluye la invocación actual por si el perfilador se vuelve a ejecutar sobre los mismos artefactos.
+    history = pd.read_sql(
+        text(
+            "SELECT unique_id, generated_at, execution_time FROM dbt_run_history "
+            "WHERE status = 'success' AND invocation_id <> :invocation_id"
+        ),
+        engine,
+        params={"invocation_id": timings["invocation_id"].iloc[0]}
+    )
+    history = history.sort_values("generated_at").groupby("unique_id").tail(window)
+    baselines = history.groupby("unique_id")["execution_time"].agg(["median", "count"])
+    baselines.columns = ["baseline_time", "baseline_runs"]
+
+    timings = timings.merge(baselines, how="left", left_on="unique_id", right_index=True)
+    timings["baseline_runs"] = timings["baseline_runs"].fillna(0).astype(int)
+    timings["regressed"] = (
+        (timings["status"] == "success")
+        & timings["baseline_time"].notna()
+        & (timings["execution_time"] > timings["baseline_time"] * threshold)
+        & (timings["execution_time"] - timings["baseline_time"] > min_seconds)
+    )
+    return timings
+
+
+def explain_slowest_models(engine, timings: pd.DataFrame, top_n: int = EXPLAIN_TOP_N) -> pd.DataFrame:
+    """
+    Obtiene el plan de ejecución (EXPLAIN FORMAT=JSON) del SQL compilado de los
+    'top_n' modelos más lentos y de todos los que presentan regresión.
+    """
+    timings["explain_plan"] = None
+    slowest = timings.nlargest(top_n, "execution_time").index
+    to_explain = slowest.union(timings.index[timings["regressed"]])
+
+    with engine.connect() as conn:
+        for idx in to_explain:
+            sql = timings.at[idx, "compiled_code"]
+            if not sql:
+                continue
+            try:
+                plan = conn.execute(text(f"EXPLAIN FORMAT=JSON {sql}")).fetchall()
+                timings.at[idx, "explain_plan"] = "\n".join(str(row[0]) for row in plan)
+            except Exception as e:
+                logging.warning(f"No se pudo obtener el EXPLAIN de '{timings.at[idx, 'model_name']}': {e}")
+    return timings
+
+
+def save_run_history(engine, timings: pd.DataFrame) -> bool:
+    """
+    Guarda las métricas de la ejecución en 'dbt_run_history'. Si la misma
+    invocación ya se había registrado, se reemplaza.
+    """
+    columns = [
+        "invocation_id", "unique_id", "generated_at", "model_name", "layer", "materialization",
+        "status", "execution_time", "rows_affected", "baseline_time", "baseline_runs", "regressed", "explain_plan",
+    ]
+    records = timings[columns].astype(object).where(pd.notna(timings[columns]), None)
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text("DELETE FROM dbt_run_history WHERE invocation_id = :invocation_id"),
+                {"invocation_id": timings["invocation_id"].iloc[0]}
+            )
+            records.to_sql("dbt_run_history", conn, if_exists="append", index=False)
+        logging.info(f"Historial de dbt actualizado con {len(records)} modelos. 📈")
+        return True
+    except Exception as e:
+        logging.error(f"Error al guardar el historial de dbt: {e}")
+        return False
+
+
+def report_regressions(timings: pd.DataFrame) -> list:
+    """
+    Registra en el log el resumen de la ejecución y devuelve la lista de modelos con regresión.
+    """
+    for _, row in timings.sort_values("execution_time", ascending=False).iterrows():
+        baseline = f"{row['baseline_time']:.2f}s" if pd.notna(row["baseline_time"]) else "sin línea base"
+        logging.info(f"   {row['model_name']:<35} {row['execution_time']:>8.2f}s  (base: {baseline})")
+
+    regressed = timings[timings["regressed"]]
+    for _, row in regressed.iterrows():
+        logging.warning(
+            f"⚠️ Regresión en '{row['model_name']}' ({row['layer']}): "
+            f"{row['execution_time']:.2f}s frente a una línea base de {row['baseline_time']:.2f}s."
+        )
+    return regressed["model_name"].tolist()
+
+
+def run_dbt_profiler(target_path: str = DBT_TARGET_PATH) -> list:
+    """
+    Orquesta el perfilado de la última ejecución de dbt: lee los artefactos,
+    compara cada modelo con su línea base, guarda los planes de los más lentos
+    y persiste el historial.
+
+    Retorna la lista de modelos con regresión, o 'None' si el perfilado falló.
+    """
+    logging.info("=== Iniciando el perfilado de la ejecución de dbt ===")
+    run_results, manifest = read_run_artifacts(target_path)
+    if run_results is None:
+        return None
+
+    timings = build_model_timings(run_results, manifest)
+    if timings.empty:
+        logging.warning("La ejecución de dbt no contiene modelos. No hay nada que perfilar.")
+        return []
+
+    engine = get_db_connection()
+    if not engine:
+        logging.error("No se pudo obtener el motor de la base de datos.")
+        return None
+
+    try:
+        if not create_history_table(engine):
+            return None
+        timings = attach_baselines(engine, timings)
+        timings = explain_slowest_models(engine, timings)
+        if not save_run_history(engine, timings):
+            return None
+        return report_regressions(timings)
+    except Exception as e:
+        logging.error(f"Error en el perfilado de dbt: {e}")
+        return None
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perfila la última ejecución de dbt y detecta regresiones.")
+    parser.add_argument("--target-path", default=DBT_TARGET_PATH, help="Carpeta 'target' de dbt.")
+    args = parser.parse_args()
+
+    result = run_dbt_profiler(args.target_path)
+    # Código de salida distinto de cero si falló o si hay regresiones, para poder usarlo en CI.
+    raise SystemExit(0 if result == [] else 1)
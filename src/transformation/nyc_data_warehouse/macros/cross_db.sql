@@ -0,0 +1,31 @@
+/*
+Macros de compatibilidad entre adaptadores. Los modelos se escribieron para
+MySQL (Cloud SQL); estas macros permiten ejecutarlos sin cambios sobre el
+target local de DuckDB.
+*/
+
+-- Convierte una columna de texto o fecha a DATE usando un formato strftime.
+{% macro parse_date(column, format) %}
+    {{ return(adapter.dispatch('parse_date')(column, format)) }}
+{% endmacro %}
+
+{% macro default__parse_date(column, format) %}
+    STR_TO_DATE({{ column }}, '{{ format }}')
+{% endmacro %}
+
+{% macro duckdb__parse_date(column, format) %}
+    CAST(TRY_STRPTIME(CAST({{ column }} AS VARCHAR), '{{ format }}') AS DATE)
+{% endmacro %}
+
+-- Convierte una columna a entero con signo.
+{% macro cast_signed(column) %}
+    {{ return(adapter.dispatch('cast_signed')(column)) }}
+{% endmacro %}
+
+{% macro default__cast_signed(column) %}
+    CAST({{ column }} AS SIGNED)
+{% endmacro %}
+
+{% macro duckdb__cast_signed(column) %}
+    CAST({{ column }} AS BIGINT)
+{% endmacro %}
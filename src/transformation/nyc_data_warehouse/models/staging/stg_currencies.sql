@@ -1,5 +1,8 @@
+-- Solo se expone la cotización más reciente: bcra_raw guarda una fila por
+-- (fecha, codigoMoneda) y acumula el histórico diario.
 SELECT
     codigoMoneda AS codigo_moneda,
     descripcion AS descripcion_moneda,
     tipoCotizacion AS cotizacion
-FROM {{ source('pipeline', 'bcra_raw') }}
\ No newline at end of file
+FROM {{ source('pipeline', 'bcra_raw') }}
+WHERE fecha = (SELECT MAX(fecha) FROM {{ source('pipeline', 'bcra_raw') }})
\ No newline at end of file
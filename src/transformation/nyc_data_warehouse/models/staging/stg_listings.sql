@@ -9,13 +9,13 @@ SELECT
     LOWER(TRIM(room_type)) AS room_type,
     -- Verificamos y limpiamos valores numéricos
     CAST(price AS DECIMAL) AS price,
-    CAST(minimum_nights AS SIGNED) AS minimum_nights,
-    CAST(number_of_reviews AS SIGNED) AS number_of_reviews,
+    {{ cast_signed('minimum_nights') }} AS minimum_nights,
+    {{ cast_signed('number_of_reviews') }} AS number_of_reviews,
     CAST(reviews_per_month AS DECIMAL) AS reviews_per_month,
-    CAST(calculated_host_listings_count AS SIGNED) AS host_listing_count,
-    CAST(availability_365 AS SIGNED) AS availability,
+    {{ cast_signed('calculated_host_listings_count') }} AS host_listing_count,
+    {{ cast_signed('availability_365') }} AS availability,
     -- Convertimos la fecha a un formato estándar
-    STR_TO_DATE(last_review, '%Y-%m-%d') AS last_review_date,
+    {{ parse_date('last_review', '%Y-%m-%d') }} AS last_review_date,
     -- latitud y longitud de la ubicación
     latitude,
     longitude